@@ -1,11 +1,21 @@
 import os
 import io
+import time
+import threading
+import queue
 import ast
+import json
+from operator import itemgetter
+from collections import defaultdict
+from copy import deepcopy
 import xmlrpc.client
+from concurrent.futures import ThreadPoolExecutor
+import requests
 import streamlit as st
 from dotenv import load_dotenv
 from docx import Document
-from datetime import datetime, time, timedelta, date
+from docx.oxml.ns import qn
+from datetime import datetime, timedelta, date
 from typing import Tuple, Optional, List, Dict, Any
 
 # =========================================
@@ -17,29 +27,106 @@ ODOO_DB = st.secrets["odoo"]["ODOO_DB"]
 ODOO_USERNAME = st.secrets["odoo"]["ODOO_USERNAME"]
 ODOO_PASSWORD = st.secrets["odoo"]["ODOO_PASSWORD"]
 
+class OdooJsonRpcClient:
+    """
+    Minimal JSON-RPC client for Odoo's "common" and "object" services.
+    Exposes the same authenticate/execute_kw signatures as xmlrpc.client.ServerProxy (and raises
+    the same xmlrpc.client.Fault on server errors) so call sites are unchanged, but reuses
+    keep-alive HTTP sessions and avoids XML (de)serialization.
+
+    The client is shared by all sessions and called from worker threads, and requests.Session
+    is not guaranteed to be thread-safe, so each call checks a Session out of an idle pool and
+    returns it afterwards; concurrent calls never share one.
+    """
+    def __init__(self, base_url: str):
+        self.endpoint = f"{base_url}/jsonrpc"
+        self._idle_sessions = queue.SimpleQueue()
+
+    def authenticate(self, db: str, login: str, password: str, user_agent_env: Dict[str, Any]) -> Any:
+        return self._call("common", "authenticate", [db, login, password, user_agent_env])
+
+    def execute_kw(self, db: str, uid: int, password: str, model: str, method: str,
+                   args: List, kwargs: Optional[Dict[str, Any]] = None) -> Any:
+        return self._call("object", "execute_kw", [db, uid, password, model, method, args, kwargs or {}])
+
+    def _call(self, service: str, method: str, args: List) -> Any:
+        payload = {
+            "jsonrpc": "2.0",
+            "method": "call",
+            "params": {"service": service, "method": method, "args": args},
+        }
+        try:
+            session = self._idle_sessions.get_nowait()
+        except queue.Empty:
+            session = requests.Session()
+        try:
+            response = session.post(self.endpoint, json=payload)
+            response.raise_for_status()
+            body = response.json()
+        finally:
+            self._idle_sessions.put(session)
+        error = body.get("error")
+        if error:
+            message = (error.get("data") or {}).get("message") or error.get("message")
+            raise xmlrpc.client.Fault(error.get("code", 1), message)
+        return body.get("result")
+
 @st.cache_resource(show_spinner=False)
-def get_odoo_connection() -> Tuple[Optional[int], Optional[xmlrpc.client.ServerProxy]]:
+def _connect_odoo() -> Tuple[Any, OdooJsonRpcClient]:
+    # One client (and so one pool of kept-alive connections) for authentication and all model
+    # calls, shared across reruns and sessions.
+    models = OdooJsonRpcClient(ODOO_URL)
+    uid = models.authenticate(ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD, {})
+    return uid, models
+
+def get_odoo_connection() -> Tuple[Optional[int], Optional[OdooJsonRpcClient]]:
     try:
-        common = xmlrpc.client.ServerProxy(f"{ODOO_URL}/xmlrpc/2/common")
-        uid = common.authenticate(ODOO_DB, ODOO_USERNAME, ODOO_PASSWORD, {})
-        if not uid:
-            st.error("Failed to authenticate with Odoo. Check credentials and DB name.")
-            return None, None
-        models = xmlrpc.client.ServerProxy(f"{ODOO_URL}/xmlrpc/2/object")
-        return uid, models
+        uid, models = _connect_odoo()
     except Exception as e:
         st.error(f"Error connecting to Odoo: {e}")
         return None, None
+    if not uid:
+        # Don't keep a failed login cached; retry on the next rerun.
+        _connect_odoo.clear()
+        st.error("Failed to authenticate with Odoo. Check credentials and DB name.")
+        return None, None
+    return uid, models
 
 # =========================================
 # Shared Helper Functions
 # =========================================
 def parse_domain(domain_string: str) -> List:
+    # Fast path: list-only domains are JSON once single quotes become double quotes. Swapping
+    # quotes is only safe when no double quotes or escapes are present; anything json rejects
+    # (tuples, True/False/None) falls through to ast.literal_eval.
+    if "'" not in domain_string:
+        candidate = domain_string
+    elif '"' not in domain_string and '\\' not in domain_string:
+        candidate = domain_string.replace("'", '"')
+    else:
+        candidate = None
+    if candidate is not None:
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            pass
     try:
         return ast.literal_eval(domain_string)
     except Exception:
         return []
 
+def resolve_fav_domains(all_favs: List[Dict[str, Any]], selected_favs: List[str]) -> List[List]:
+    """Returns the parsed, non-empty domains of the selected favorites, looked up by name."""
+    by_name = {f["name"]: f for f in all_favs}
+    fav_domains = []
+    for fav in selected_favs:
+        rec = by_name.get(fav)
+        if rec:
+            d = parse_domain(rec.get("domain", "[]"))
+            if d:
+                fav_domains.append(d)
+    return fav_domains
+
 def combine_domains_or(domains_list: List[List]) -> List:
     if not domains_list:
         return []
@@ -48,21 +135,43 @@ def combine_domains_or(domains_list: List[List]) -> List:
         combined = ['|'] + combined + d
     return combined
 
+# Records per search_read call; wide date ranges are fetched page by page.
+PAGE_SIZE = 500
+
+def fetch_all_pages(fetch_page, models, uid, domain: List, **kwargs) -> Optional[List[Dict[str, Any]]]:
+    """
+    Calls fetch_page(models, uid, domain, limit=..., offset=..., **kwargs) until a short page comes back.
+    Returns None as soon as a page fails (fetch_page returns None), so a report is never built from part of the data.
+    """
+    records = []
+    offset = 0
+    while True:
+        batch = fetch_page(models, uid, domain, limit=PAGE_SIZE, offset=offset, **kwargs)
+        if batch is None:
+            return None
+        records.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            return records
+        offset += PAGE_SIZE
+
 def get_field_name(many2one_val: Any) -> str:
     if isinstance(many2one_val, list) and len(many2one_val) > 1:
         return many2one_val[1]
     return ""
 
+# Odoo returns datetimes in GMT; reports are shown in GMT+3.
+GMT_PLUS_3 = timedelta(hours=3)
+
 def format_datetime_range(start_dt_str: str, end_dt_str: str) -> str:
     """Converts times (assumed GMT) to GMT+3 and returns the formatted range."""
     try:
         if start_dt_str:
-            dt_start = datetime.strptime(start_dt_str, "%Y-%m-%d %H:%M:%S") + timedelta(hours=3)
+            dt_start = datetime.fromisoformat(start_dt_str) + GMT_PLUS_3
             start_fmt = dt_start.strftime("%Y-%m-%d %H:%M:%S")
         else:
             start_fmt = ""
         if end_dt_str:
-            dt_end = datetime.strptime(end_dt_str, "%Y-%m-%d %H:%M:%S") + timedelta(hours=3)
+            dt_end = datetime.fromisoformat(end_dt_str) + GMT_PLUS_3
             end_fmt = dt_end.strftime("%Y-%m-%d %H:%M:%S")
         else:
             end_fmt = ""
@@ -74,108 +183,193 @@ def format_datetime_range(start_dt_str: str, end_dt_str: str) -> str:
         return start_fmt
     return f"{start_fmt} -> {end_fmt}"
 
+@st.cache_resource(show_spinner=False)
+def _template_document() -> Tuple[Document, threading.Lock]:
+    # python-docx's default template, unzipped and parsed once per process. Downloads can
+    # render from several sessions at once, so copies are taken under a lock.
+    return Document(), threading.Lock()
+
+def new_document() -> Document:
+    """Same as Document(), but deep-copies an already parsed template instead of re-reading default.docx."""
+    template, lock = _template_document()
+    with lock:
+        return deepcopy(template)
+
 # =========================================
 # (A) MORNING TASK LIST (from planning.slot)
 # =========================================
+# planning.slot fields read by get_tasks. Minimal set: grouping (resource_id) and
+# build_morning_text use nothing else.
+TASK_FIELDS = [
+    'resource_id',
+    'role_id',
+    'x_studio_parent_task',
+    'x_studio_sub_task_1',
+    'start_datetime',
+    'end_datetime'
+]
+
+# planning.slot's default order, spelled out so paging always has a unique order to rely on.
+# Designer rows in the Morning document follow the order tasks come back in.
+TASK_ORDER = 'start_datetime, id desc'
+
+# Sub-task details read through the x_studio_sub_task_1 relation in the same
+# planning.slot search_read, mapped to their field name on project.task.
+SUBTASK_RELATED_FIELDS = {
+    'x_studio_sub_task_1.x_studio_service_category_1': 'x_studio_service_category_1',
+    'x_studio_sub_task_1.x_studio_total_no_of_design_units_sc1': 'x_studio_total_no_of_design_units_sc1',
+}
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _fetch_planning_favorites(_models, uid) -> List[Dict[str, Any]]:
+    # Favorites rarely change; cache per uid (the leading underscore keeps the
+    # connection object out of the cache key). Errors propagate and are not cached.
+    domain = [('model_id', '=', 'planning.slot')]
+    fields_to_read = ['name', 'domain']
+    return _models.execute_kw(
+        ODOO_DB, uid, ODOO_PASSWORD,
+        'ir.filters', 'search_read',
+        [domain],
+        {'fields': fields_to_read}
+    )
+
 def get_planning_favorites(models, uid) -> List[Dict[str, Any]]:
     try:
-        domain = [('model_id', '=', 'planning.slot')]
-        fields_to_read = ['name', 'domain']
-        return models.execute_kw(
-            ODOO_DB, uid, ODOO_PASSWORD,
-            'ir.filters', 'search_read',
-            [domain],
-            {'fields': fields_to_read}
-        )
+        return _fetch_planning_favorites(models, uid)
     except Exception as e:
         st.error(f"Error retrieving favorites: {e}")
         return []
 
-def get_tasks(models, uid, final_domain: List) -> List[Dict[str, Any]]:
-    fields_to_read = [
-        'resource_id',
-        'role_id',
-        'x_studio_parent_task',
-        'x_studio_sub_task_1',
-        'start_datetime',
-        'end_datetime',
-        'state',
-        'allocated_hours'
-    ]
+@st.cache_resource(show_spinner=False)
+def _server_features() -> Dict[str, bool]:
+    # What the Odoo server turned out to support, shared by every session of this process
+    # so only the first fetch pays for a rejected request.
+    return {"subtask_related_fields": True}
+
+def rejects_related_fields(e: Exception) -> bool:
+    # Newer Odoo versions answer dotted field names with "Invalid field '<path>' on model ...".
+    # Match the paths we sent, so an invalid field in a favorite's domain isn't mistaken for this.
+    if not isinstance(e, xmlrpc.client.Fault):
+        return False
+    message = str(e.faultString)
+    return "Invalid field" in message and any(path in message for path in SUBTASK_RELATED_FIELDS)
+
+def get_tasks(models, uid, final_domain: List, limit: int = PAGE_SIZE, offset: int = 0,
+              features: Optional[Dict[str, bool]] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    features is main()'s _server_features() dict. When the server rejects the dotted sub-task
+    paths, "subtask_related_fields" is switched off there, so later pages (and later fetches)
+    go straight to the plain fields.
+    """
+    if features is None:
+        features = {"subtask_related_fields": True}
+    if features["subtask_related_fields"]:
+        try:
+            return models.execute_kw(
+                ODOO_DB, uid, ODOO_PASSWORD,
+                'planning.slot', 'search_read',
+                [final_domain],
+                {'fields': TASK_FIELDS + list(SUBTASK_RELATED_FIELDS),
+                 'limit': limit, 'offset': offset, 'order': TASK_ORDER}
+            )
+        except Exception as e:
+            if not rejects_related_fields(e):
+                st.error(f"Error retrieving tasks: {e}")
+                return None
+            features["subtask_related_fields"] = False
     try:
         return models.execute_kw(
             ODOO_DB, uid, ODOO_PASSWORD,
             'planning.slot', 'search_read',
             [final_domain],
-            {'fields': fields_to_read}
+            {'fields': TASK_FIELDS, 'limit': limit, 'offset': offset, 'order': TASK_ORDER}
         )
     except Exception as e:
         st.error(f"Error retrieving tasks: {e}")
-        return []
+        return None
 
-def fetch_subtask_details(models, uid: int, subtask_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+# Seconds a fetched sub-task stays reusable across generations.
+SUBTASK_CACHE_TTL = 300
+
+@st.cache_resource(show_spinner=False)
+def _subtask_cache() -> Tuple[Dict[Tuple[int, int], Tuple[float, Dict[str, Any]]], threading.Lock]:
+    # Streamlit re-executes this script on every rerun, so a plain module-level dict would
+    # not survive; cache_resource keeps one (uid, subtask_id) -> (fetched_at, record) store.
+    return {}, threading.Lock()
+
+def fetch_subtask_details(models, uid: int, subtask_ids: Tuple[int, ...]) -> Dict[int, Dict[str, Any]]:
+    """subtask_ids is a sorted tuple of distinct ids, so lookups and the read request are deterministic."""
     if not subtask_ids:
         return {}
-    subtask_ids = list(set(subtask_ids))
-    fields_to_read = [
-        'x_studio_service_category_1',
-        'x_studio_total_no_of_design_units_sc1'
-    ]
+    cache, lock = _subtask_cache()
+    now = time.monotonic()
+    subtask_map = {}
+    with lock:
+        for sub_id in subtask_ids:
+            entry = cache.get((uid, sub_id))
+            if entry and now - entry[0] < SUBTASK_CACHE_TTL:
+                subtask_map[sub_id] = entry[1]
+    missing_ids = [sub_id for sub_id in subtask_ids if sub_id not in subtask_map]
+    if not missing_ids:
+        return subtask_map
     try:
         records = models.execute_kw(
             ODOO_DB, uid, ODOO_PASSWORD,
             'project.task', 'read',
-            [subtask_ids],
-            {'fields': fields_to_read}
+            [missing_ids],
+            {'fields': list(SUBTASK_RELATED_FIELDS.values())}
         )
-        return {r['id']: r for r in records}
     except Exception as e:
         st.error(f"Error retrieving sub-task details: {e}")
-        return {}
+        return subtask_map
+    with lock:
+        for key in [k for k, (fetched_at, _) in cache.items() if now - fetched_at >= SUBTASK_CACHE_TTL]:
+            del cache[key]
+        for r in records:
+            cache[(uid, r['id'])] = (now, r)
+            subtask_map[r['id']] = r
+    return subtask_map
 
 def build_morning_text(task: Dict[str, Any], subtask_map: Dict[int, Dict[str, Any]]) -> str:
-    lines = []
-    # Role
+    # (prefix, value) pairs in output order; pairs with an empty value are skipped.
     role_name = get_field_name(task.get('role_id'))
-    if role_name:
-        lines.append(f"Role: {role_name}")
-    # Parent Task
     parent_name = get_field_name(task.get('x_studio_parent_task'))
-    if not parent_name:
-        lines.append("Parent Task: Missing Parent Task")
-    else:
-        lines.append(f"Parent Task: {parent_name}")
-        # Sub Task
-        sub_val = task.get('x_studio_sub_task_1')
-        sub_name = get_field_name(sub_val)
-        if sub_name:
-            lines.append(f"Sub Task: {sub_name}")
-            sub_id = sub_val[0] if isinstance(sub_val, list) and len(sub_val) > 0 else None
-            if sub_id and sub_id in subtask_map:
-                sub_rec = subtask_map[sub_id]
-                # Format service category: if it's a many2one, extract the second element
-                sc = sub_rec.get('x_studio_service_category_1', '')
-                if isinstance(sc, list):
-                    sc = get_field_name(sc)
-                units = sub_rec.get('x_studio_total_no_of_design_units_sc1', '')
-                if sc:
-                    lines.append(f"Service Category: {sc}")
-                if units:
-                    lines.append(f"No. of Units: {units}")
+    pairs = [
+        ("Role: ", role_name),
+        ("Parent Task: ", parent_name or "Missing Parent Task"),
+    ]
+    # Sub Task details are only listed when the parent task is set
+    sub_val = task.get('x_studio_sub_task_1')
+    sub_name = get_field_name(sub_val) if parent_name else ""
+    if sub_name:
+        sub_id = sub_val[0]
+        if sub_id in subtask_map:
+            sub_rec = subtask_map[sub_id]
+        else:
+            # Details read alongside the task via SUBTASK_RELATED_FIELDS
+            sub_rec = {name: task.get(path) for path, name in SUBTASK_RELATED_FIELDS.items()}
+        # Format service category: if it's a many2one, extract the second element
+        sc = sub_rec.get('x_studio_service_category_1', '')
+        if isinstance(sc, list):
+            sc = get_field_name(sc)
+        pairs += [
+            ("Sub Task: ", sub_name),
+            ("Service Category: ", sc),
+            ("No. of Units: ", sub_rec.get('x_studio_total_no_of_design_units_sc1', '')),
+        ]
     # Date Range (convert to GMT+3)
     start_dt_str = task.get('start_datetime') or ""
     end_dt_str = task.get('end_datetime') or ""
-    drange = format_datetime_range(start_dt_str, end_dt_str)
-    if drange:
-        lines.append(f"Date Range: {drange}")
-    return "\n".join(lines)
+    pairs.append(("Date Range: ", format_datetime_range(start_dt_str, end_dt_str)))
+    return "\n".join([prefix + str(value) for prefix, value in pairs if value])
 
 def create_morning_table(doc: Document, 
                          tasks_by_designer: Dict[str, List[Dict[str, Any]]],
-                         subtask_map: Dict[int, Dict[str, Any]]) -> bytes:
+                         subtask_map: Dict[int, Dict[str, Any]]) -> io.BytesIO:
     """
     Creates a 2-column table with one row per designer.
-    The second column concatenates all tasks (sorted by start time) for that designer.
+    The second column concatenates all tasks for that designer, in the order given
+    (main() already sorts each designer's tasks by start time).
     """
     doc.add_heading("Morning Task List", level=1)
     table = doc.add_table(rows=1, cols=2)
@@ -186,105 +380,120 @@ def create_morning_table(doc: Document,
     hdr_cells[0].text = "Designer"
     hdr_cells[1].text = "Task Details"
     
-    # For each designer, sort tasks by start_datetime (earlier first)
     for designer, tasks in tasks_by_designer.items():
-        try:
-            tasks.sort(key=lambda t: datetime.strptime(t.get('start_datetime', "1970-01-01 00:00:00"), "%Y-%m-%d %H:%M:%S"))
-        except Exception:
-            pass  # In case of parsing error, leave unsorted.
         row_cells = table.add_row().cells
         row_cells[0].text = designer
         task_texts = [build_morning_text(task, subtask_map) for task in tasks]
         row_cells[1].text = "\n\n".join(task_texts)
     
+    # Hand the stream itself to st.download_button rather than copying it out with getvalue().
     out_stream = io.BytesIO()
     doc.save(out_stream)
-    return out_stream.getvalue()
+    out_stream.seek(0)
+    return out_stream
 
 # =========================================
 # (B) RECAP from x_recaps (Unchanged)
 # =========================================
-def get_recaps(models, uid, date_domain: List) -> List[Dict[str, Any]]:
-    fields_to_read = [
-        'create_uid',
-        'x_studio_shift',
-        'x_studio_recap_cat',
-        'x_studio_designer_summary',
-        'create_date',
-        'x_studio_parent_task',
-        'x_studio_subtask'
-    ]
+# x_recaps fields read by get_recaps. Minimal set: create_uid for grouping, the rest
+# for build_recap_notes_text.
+RECAP_FIELDS = [
+    'create_uid',
+    'x_studio_shift',
+    'x_studio_recap_cat',
+    'x_studio_designer_summary',
+    'create_date',
+    'x_studio_parent_task',
+    'x_studio_subtask'
+]
+
+def get_recaps(models, uid, date_domain: List, limit: int = PAGE_SIZE, offset: int = 0) -> Optional[List[Dict[str, Any]]]:
+    # Keep x_recaps' default order (recaps are listed in it); a custom model's order ends in id,
+    # so it is already unique for paging.
     try:
         recs = models.execute_kw(
             ODOO_DB, uid, ODOO_PASSWORD,
             'x_recaps', 'search_read',
             [date_domain],
-            {'fields': fields_to_read}
+            {'fields': RECAP_FIELDS, 'limit': limit, 'offset': offset}
         )
         return recs
     except Exception as e:
         st.error(f"Error retrieving recaps from x_recaps: {e}")
-        return []
+        return None
 
 def build_recap_notes_text(rec: Dict[str, Any]) -> str:
-    lines = []
-    pt_val = rec.get('x_studio_parent_task')
-    if isinstance(pt_val, list) and len(pt_val) > 1:
-        lines.append(f"Parent Task: {pt_val[1]}")
-    st_val = rec.get('x_studio_subtask')
-    if st_val:
-        lines.append(f"Sub Task: {st_val}")
-    shift = rec.get('x_studio_shift', '')
-    if shift:
-        lines.append(f"Shift: {shift}")
-    rc = rec.get('x_studio_recap_cat', '')
-    if rc:
-        lines.append(f"Recap Category: {rc}")
-    cmt = rec.get('x_studio_designer_summary', '')
-    if cmt:
-        lines.append(f"Comment: {cmt}")
-    dt = rec.get('create_date', '')
-    if dt:
-        lines.append(f"Date & Time: {dt}")
-    return "\n".join(lines)
-
-def create_recap_notes_table(doc: Document, recs_by_designer: Dict[str, List[Dict[str, Any]]]) -> bytes:
+    # (prefix, value) pairs in output order; pairs with an empty value are skipped.
+    pairs = (
+        ("Parent Task: ", get_field_name(rec.get('x_studio_parent_task'))),
+        ("Sub Task: ", rec.get('x_studio_subtask')),
+        ("Shift: ", rec.get('x_studio_shift')),
+        ("Recap Category: ", rec.get('x_studio_recap_cat')),
+        ("Comment: ", rec.get('x_studio_designer_summary')),
+        ("Date & Time: ", rec.get('create_date')),
+    )
+    return "\n".join([prefix + str(value) for prefix, value in pairs if value])
+
+def create_recap_notes_table(doc: Document, recs_by_designer: Dict[str, List[Dict[str, Any]]]) -> io.BytesIO:
     doc.add_heading("Recap", level=1)
     table = doc.add_table(rows=1, cols=2)
     table.style = 'Table Grid'
     hdr_cells = table.rows[0].cells
     hdr_cells[0].text = "Designer"
     hdr_cells[1].text = "Recap Details"
+    # Build one template row through python-docx, then clone its <w:tr> for every recap
+    # and append the clones in one go instead of calling table.add_row() per record.
+    template_tr = table.add_row()._tr
+    for tc in template_tr.iter(qn('w:tc')):
+        tc.p_lst[0].add_r()
+    table._tbl.remove(template_tr)
+    rows = []
     for designer, recs in recs_by_designer.items():
         for r in recs:
-            row_cells = table.add_row().cells
-            row_cells[0].text = designer
-            row_cells[1].text = build_recap_notes_text(r)
+            tr = deepcopy(template_tr)
+            designer_run, details_run = tr.iter(qn('w:r'))
+            designer_run.text = designer
+            details_run.text = build_recap_notes_text(r)
+            rows.append(tr)
+    table._tbl.extend(rows)
     out_stream = io.BytesIO()
     doc.save(out_stream)
-    return out_stream.getvalue()
+    out_stream.seek(0)
+    return out_stream
 
 # =========================================
 # (C) Helper: Get Employees Matching Favorites (for Recaps)
 # =========================================
-def get_employees_from_favorites(models, uid, fav_domains: List[List]) -> set:
-    """For each favorite domain, fetch hr.employee records and return a set of employee names."""
+def get_employees_from_favorites(models, uid, fav_domains: List[List]) -> frozenset:
+    """
+    For each favorite domain, fetch hr.employee records and return a frozenset of employee names.
+    The lookups are independent, so they run concurrently; errors are reported from the main thread.
+    """
+    if not fav_domains:
+        return frozenset()
     emp_names = set()
-    for domain in fav_domains:
-        try:
-            emps = models.execute_kw(
+    with ThreadPoolExecutor(max_workers=min(8, len(fav_domains))) as executor:
+        futures = [
+            executor.submit(
+                models.execute_kw,
                 ODOO_DB, uid, ODOO_PASSWORD,
                 'hr.employee', 'search_read',
                 [domain],
                 {'fields': ['name']}
             )
+            for domain in fav_domains
+        ]
+        for domain, future in zip(fav_domains, futures):
+            try:
+                emps = future.result()
+            except Exception as e:
+                st.error(f"Error retrieving employees for domain {domain}: {e}")
+                continue
             for emp in emps:
                 name = emp.get('name')
                 if name:
                     emp_names.add(name)
-        except Exception as e:
-            st.error(f"Error retrieving employees for domain {domain}: {e}")
-    return emp_names
+    return frozenset(emp_names)
 
 # =========================================
 # MAIN
@@ -302,103 +511,116 @@ def main():
         st.stop()
 
     report_type = st.selectbox("Select Report Type", ["Morning Task List", "Recap"])
-    
-    st.subheader("Select Date Range")
-    start_date = st.date_input("Start Date", value=datetime.today())
-    end_date = st.date_input("End Date", value=datetime.today())
+
+    all_favs = get_planning_favorites(models, uid)
+    fav_names = [f["name"] for f in all_favs]
+
+    # The filters sit in a form so editing them doesn't rerun the script until it is submitted.
+    with st.form("report_filters", clear_on_submit=False):
+        st.subheader("Select Date Range")
+        start_date = st.date_input("Start Date", value=datetime.today())
+        end_date = st.date_input("End Date", value=datetime.today())
+        # Favorites are shared by both reports: planning.slot filters for the Morning list,
+        # and the creators to keep for Recaps.
+        if report_type == "Morning Task List":
+            st.write("Optional: Select Favorites for planning.slot.")
+            submit_label = "Fetch & Generate Morning Tasks"
+        else:
+            st.write("Optional: Select Favorites for Recaps (filter by creator).")
+            submit_label = "Fetch & Generate Recap from x_recaps"
+        selected_favs = st.multiselect("Select Favorites (optional)", fav_names)
+        submitted = st.form_submit_button(submit_label)
+
     # For planning.slot, filter on start_datetime; for recaps, on create_date
-    start_dt_str = datetime.combine(start_date, time(0, 0, 0)).strftime("%Y-%m-%d %H:%M:%S")
-    end_dt_str = datetime.combine(end_date, time(23, 59, 59)).strftime("%Y-%m-%d %H:%M:%S")
+    start_dt_str = f"{start_date.isoformat()} 00:00:00"
+    end_dt_str = f"{end_date.isoformat()} 23:59:59"
+    fav_domains = resolve_fav_domains(all_favs, selected_favs)
     
     if report_type == "Morning Task List":
-        st.write("Optional: Select Favorites for planning.slot.")
-        all_favs = get_planning_favorites(models, uid)
-        fav_names = [f["name"] for f in all_favs] if all_favs else []
-        selected_favs = st.multiselect("Select Favorites (optional)", fav_names)
-        
-        if st.button("Fetch & Generate Morning Tasks"):
-            fav_domains = []
-            for fav in selected_favs:
-                rec = next((x for x in all_favs if x["name"] == fav), None)
-                if rec:
-                    d = parse_domain(rec.get("domain", "[]"))
-                    if d:
-                        fav_domains.append(d)
+        if submitted:
             combined_fav_domain = combine_domains_or(fav_domains)
             date_domain = [
                 ('start_datetime', '>=', start_dt_str),
                 ('start_datetime', '<=', end_dt_str)
             ]
             final_domain = (['&'] + date_domain + combined_fav_domain) if combined_fav_domain else date_domain
-            tasks = get_tasks(models, uid, final_domain)
+            features = _server_features()
+            tasks = fetch_all_pages(get_tasks, models, uid, final_domain, features=features)
+            if tasks is None:
+                # A page failed and was already reported; don't offer a partial list.
+                st.stop()
+            if tasks and not all(path in tasks[0] for path in SUBTASK_RELATED_FIELDS):
+                # Older servers silently ignore the dotted paths; stop sending them.
+                features["subtask_related_fields"] = False
             if tasks:
                 st.success(f"Fetched {len(tasks)} tasks from planning.slot!")
-                # Group tasks by designer and sort them by start_datetime (earlier first)
-                tasks_by_designer = {}
+                # Group tasks by designer and sort them by start_datetime (earlier first).
+                # Odoo's "YYYY-MM-DD HH:MM:SS" strings sort correctly as text, so no parsing is needed.
+                tasks_by_designer = defaultdict(list)
                 for t in tasks:
-                    res = t.get('resource_id')
-                    designer = res[1] if (res and isinstance(res, list) and len(res) > 1) else "Unassigned"
-                    tasks_by_designer.setdefault(designer, []).append(t)
+                    t['_sort_key'] = t.get('start_datetime') or ''
+                    # search_read returns many2one values as [id, name] or False
+                    res = t['resource_id']
+                    designer = res[1] if res else "Unassigned"
+                    tasks_by_designer[designer].append(t)
                 for designer in tasks_by_designer:
-                    try:
-                        tasks_by_designer[designer].sort(
-                            key=lambda t: datetime.strptime(t.get('start_datetime', "1970-01-01 00:00:00"), "%Y-%m-%d %H:%M:%S")
-                        )
-                    except Exception:
-                        pass
-                subtask_ids = []
-                for t in tasks:
-                    sub_val = t.get('x_studio_sub_task_1')
-                    if isinstance(sub_val, list) and len(sub_val) > 0:
-                        subtask_ids.append(sub_val[0])
-                subtask_map = fetch_subtask_details(models, uid, subtask_ids)
-                doc = Document()
-                doc_bytes = create_morning_table(doc, tasks_by_designer, subtask_map)
-                st.download_button(
-                    label="Download Morning Tasks",
-                    data=doc_bytes,
-                    file_name="Morning_Task_List.docx",
-                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
-                )
+                    tasks_by_designer[designer].sort(key=itemgetter('_sort_key'))
+                if tasks_by_designer:
+                    if all(path in tasks[0] for path in SUBTASK_RELATED_FIELDS):
+                        # Sub-task details already came back with the tasks.
+                        subtask_map = {}
+                    else:
+                        subtask_ids = set()
+                        for t in tasks:
+                            sub_val = t.get('x_studio_sub_task_1')
+                            if isinstance(sub_val, list) and len(sub_val) > 0:
+                                subtask_ids.add(sub_val[0])
+                        subtask_map = fetch_subtask_details(models, uid, tuple(sorted(subtask_ids)))
+                    st.write(f"Preview: {len(tasks)} tasks across {len(tasks_by_designer)} designers.")
+                    # The .docx is only built when the download is requested, not on every fetch.
+                    st.download_button(
+                        label="Download Morning Tasks",
+                        data=lambda: create_morning_table(new_document(), tasks_by_designer, subtask_map),
+                        file_name="Morning_Task_List.docx",
+                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                        on_click="ignore"
+                    )
+                else:
+                    st.error("No tasks to include in the Morning Task List.")
             else:
                 st.error("No tasks found with the selected filters (Morning).")
     else:
-        # Recap (x_recaps) branch remains unchanged
-        st.write("Optional: Select Favorites for Recaps (filter by creator).")
-        all_favs = get_planning_favorites(models, uid)
-        fav_names = [f["name"] for f in all_favs] if all_favs else []
-        selected_favs = st.multiselect("Select Favorites (optional)", fav_names)
-        fav_domains = []
-        for fav in selected_favs:
-            rec = next((x for x in all_favs if x["name"] == fav), None)
-            if rec:
-                d = parse_domain(rec.get("domain", "[]"))
-                if d:
-                    fav_domains.append(d)
-        allowed_emp_names = get_employees_from_favorites(models, uid, fav_domains) if fav_domains else None
-        
-        if st.button("Fetch & Generate Recap from x_recaps"):
+        if submitted:
+            allowed_emp_names = get_employees_from_favorites(models, uid, fav_domains) if fav_domains else None
             recap_domain = [
                 ('create_date', '>=', start_dt_str),
                 ('create_date', '<=', end_dt_str)
             ]
-            recs = get_recaps(models, uid, recap_domain)
+            recs = fetch_all_pages(get_recaps, models, uid, recap_domain)
+            if recs is None:
+                st.stop()
             if recs:
-                recs_by_designer = {}
+                recs_by_designer = defaultdict(list)
                 for r in recs:
-                    c_uid = r.get('create_uid')
-                    designer_name = c_uid[1] if (isinstance(c_uid, list) and len(c_uid) > 1) else "Unassigned"
-                    if allowed_emp_names is not None and designer_name not in allowed_emp_names:
-                        continue
-                    recs_by_designer.setdefault(designer_name, []).append(r)
+                    c_uid = r['create_uid']
+                    recs_by_designer[c_uid[1] if c_uid else "Unassigned"].append(r)
+                if allowed_emp_names is not None:
+                    # Filter once per designer rather than once per record
+                    recs_by_designer = {
+                        name: designer_recs for name, designer_recs in recs_by_designer.items()
+                        if name in allowed_emp_names
+                    }
                 if recs_by_designer:
-                    doc = Document()
-                    doc_bytes = create_recap_notes_table(doc, recs_by_designer)
+                    st.write(
+                        f"Preview: {sum(len(designer_recs) for designer_recs in recs_by_designer.values())} recaps "
+                        f"across {len(recs_by_designer)} designers."
+                    )
                     st.download_button(
                         label="Download Recap Report",
-                        data=doc_bytes,
+                        data=lambda: create_recap_notes_table(new_document(), recs_by_designer),
                         file_name="Recap.docx",
-                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+                        mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                        on_click="ignore"
                     )
                 else:
                     st.error("No recaps found matching the selected favorites.")